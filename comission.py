@@ -18,84 +18,24 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
-from sklearn.neighbors import NearestNeighbors
 
+from config import (
+    AUTHKEY,
+    ICP_COARSE_STEP,
+    ICP_MAX_ITERATIONS,
+    MANAGER_HOST,
+    MANAGER_PORT,
+    ROBUST_ICP,
+    SHM_NAME,
+    TRANSPORT,
+)
+from matching import ICP, ShapeComparator
+from profiler import PROFILE_COMMAND, FrameProfiler
+from robots import FIELD_LIMIT
 from shape import Circle, Parallelogram, Square, Triangle
+from transport import TransportServer
 
-
-class ShapeComparator:
-    @staticmethod
-    def find_closest_points(original_points, distorted_points):
-        """
-        Находит ближайшие точки между двумя наборами с использованием NearestNeighbors.
-        :param original_points: Оригинальные точки (N x 2).
-        :param distorted_points: Искажённые точки (M x 2).
-        :return: Ближайшие точки из оригинального набора.
-        """
-        nbrs = NearestNeighbors(n_neighbors=1, algorithm="auto").fit(original_points)
-
-        _, indices = nbrs.kneighbors(distorted_points)
-
-        return original_points[indices.flatten()]
-
-    @staticmethod
-    def calculate_mse(original_points, distorted_points):
-        """
-        Вычисляет среднеквадратичную ошибку (MSE).
-        :param original_points: Оригинальные точки (N x 2).
-        :param distorted_points: Искажённые точки (M x 2).
-        :return: Среднеквадратичная ошибка.
-        """
-        closest_points = ShapeComparator.find_closest_points(
-            original_points, distorted_points
-        )
-        squared_errors = np.sum((closest_points - distorted_points) ** 2, axis=1)
-        return np.mean(squared_errors)
-
-
-class ICP:
-    @staticmethod
-    def icp_align(
-        original_points, distorted_points, max_iterations=50, mse_threshold=0.10
-    ):
-        """
-        Выравнивает искажённые точки относительно оригинальных с использованием ICP.
-        :param original_points: Оригинальные точки (N x 2).
-        :param distorted_points: Искажённые точки (M x 2).
-        :param max_iterations: Максимальное число итераций.
-        :param mse_threshold: Порог MSE для остановки.
-        :return: Выровненные точки и MSE.
-        """
-        mse = float("inf")
-        aligned_points = distorted_points.copy()
-
-        for iteration in range(max_iterations):
-            closest_points = ShapeComparator.find_closest_points(
-                original_points, aligned_points
-            )
-
-            mse = ShapeComparator.calculate_mse(original_points, aligned_points)
-
-            if mse < mse_threshold:
-                break
-
-            centroid_original = np.mean(closest_points, axis=0)
-            centroid_distorted = np.mean(aligned_points, axis=0)
-
-            centered_original = closest_points - centroid_original
-            centered_distorted = aligned_points - centroid_distorted
-
-            H = np.dot(centered_distorted.T, centered_original)
-
-            U, _, Vt = np.linalg.svd(H)
-
-            R = np.dot(Vt.T, U.T)
-
-            t = centroid_original - np.dot(R, centroid_distorted)
-
-            aligned_points = np.dot(aligned_points, R.T) + t
-
-        return aligned_points, mse
+PROFILE_FRAMES = 20
 
 
 class CommissionApp(QMainWindow):
@@ -104,6 +44,7 @@ class CommissionApp(QMainWindow):
         self.data_queue = Queue()
         self.command_queue = Queue()
         self.manager = None
+        self.transport = None
         self.shm = None
         self.server_thread = None
 
@@ -121,6 +62,8 @@ class CommissionApp(QMainWindow):
         self.metric_labels = []
         self.shape_names = ["Квадрат", "Треугольник", "Круг", "Параллелограмм"]
         self.current_results = {}
+        self.references = {}
+        self.profiler = FrameProfiler("commission")
 
         for i in range(4):
             container = QVBoxLayout()
@@ -169,6 +112,10 @@ class CommissionApp(QMainWindow):
         self.stop_button.clicked.connect(self.stop_process)  # type: ignore
         self.buttons_layout.addWidget(self.stop_button)
 
+        self.profile_button = QPushButton(f"Профиль ({PROFILE_FRAMES} кадров)")
+        self.profile_button.clicked.connect(self.profile_process)  # type: ignore
+        self.buttons_layout.addWidget(self.profile_button)
+
         self.setup_manager()
 
         self.timer = QTimer()
@@ -176,19 +123,31 @@ class CommissionApp(QMainWindow):
         self.timer.start(1)
 
     def setup_manager(self):
+        if TRANSPORT == "asyncio":
+            self.setup_transport()
+            return
+
         BaseManager.register("get_data_queue", callable=lambda: self.data_queue)
         BaseManager.register("get_command_queue", callable=lambda: self.command_queue)
 
-        self.manager = BaseManager(address=("127.0.0.1", 50000), authkey=b"abracadabra")
-        self.shm = SharedMemory(name="robot_memory", create=True, size=1048576)
+        self.manager = BaseManager(
+            address=(MANAGER_HOST, MANAGER_PORT), authkey=AUTHKEY
+        )
+        self.shm = SharedMemory(name=SHM_NAME, create=True, size=1048576)
 
         self.server_thread = threading.Thread(target=self.start_server)
         self.server_thread.daemon = True
         self.server_thread.start()
 
+    def setup_transport(self):
+        self.transport = TransportServer()
+        self.data_queue = self.transport.data_queue
+        self.command_queue = self.transport.command_queue
+        self.server_thread = self.transport.start()
+
     def start_server(self):
         server = self.manager.get_server()
-        print("Сервер запущен на 127.0.0.1:50000")
+        print(f"Сервер запущен на {MANAGER_HOST}:{MANAGER_PORT}")
         server.serve_forever()
 
     def start_process(self):
@@ -198,6 +157,14 @@ class CommissionApp(QMainWindow):
     def stop_process(self):
         self.command_queue.put("stop")
 
+    def profile_process(self):
+        """
+        Запускает профилирование следующих кадров у комиссии и роботов.
+        :return:
+        """
+        self.profiler.request(PROFILE_FRAMES)
+        self.command_queue.put(f"{PROFILE_COMMAND} {PROFILE_FRAMES}")
+
     def clear_figures(self):
         for widget in self.figure_widgets:
             widget.clear()
@@ -205,10 +172,20 @@ class CommissionApp(QMainWindow):
 
     def update_figures(self):
         if not self.data_queue.empty():
-            size = self.data_queue.get()
+            item = self.data_queue.get()
+            # В режиме транспорта кадр приходит вместе с соединением
+            # отправителя: раунд и "next" у каждого процесса роботов свои.
+            sender = None
+            if isinstance(item, tuple):
+                item, sender = item
+            results = self.current_results.setdefault(sender, {})
+            self.profiler.begin()
             try:
                 st_time = time.time()
-                raw_data = bytes(self.shm.buf[:size]).decode("utf-8")
+                if isinstance(item, bytes):
+                    raw_data = item.decode("utf-8")
+                else:
+                    raw_data = bytes(self.shm.buf[:item]).decode("utf-8")
                 data = json.loads(raw_data)
 
                 shape_name = data["shape"]
@@ -220,11 +197,32 @@ class CommissionApp(QMainWindow):
                     shape_name
                 ]
 
-                original_shape = self.get_original_shape(shape_name)
-                original_shape.generate_reference()
-                original_points = original_shape.points
+                reference = self.get_reference(shape_name)
+                original_points = reference["points"]
 
-                aligned_points, mse = ICP.icp_align(original_points, points)
+                if ROBUST_ICP:
+                    result = ICP.robust_icp_align(
+                        original_points,
+                        points,
+                        max_iterations=ICP_MAX_ITERATIONS,
+                        clip_limit=FIELD_LIMIT,
+                        index=reference["index"],
+                    )
+                    aligned_points = result["aligned_points"]
+                    mse = result["mse"]
+                    mse_text = (
+                        f"MSE: {mse:.4f} (inliers: {result['inlier_mse']:.4f}, "
+                        f"итераций: {result['iterations']})"
+                    )
+                else:
+                    aligned_points, mse = ICP.icp_align(
+                        original_points,
+                        points,
+                        max_iterations=ICP_MAX_ITERATIONS,
+                        coarse_step=ICP_COARSE_STEP,
+                        index=reference["index"],
+                    )
+                    mse_text = f"MSE: {mse:.4f}"
 
                 self.figure_widgets[index].clear()
                 self.figure_widgets[index].plot(
@@ -255,9 +253,9 @@ class CommissionApp(QMainWindow):
                 )
 
                 self.metric_labels[index].setText(
-                    f"{self.shape_names[index]}\nMSE: {mse:.4f}"
+                    f"{self.shape_names[index]}\n{mse_text}"
                 )
-                self.current_results[shape_name] = {
+                results[shape_name] = {
                     "original_points": original_points,
                     "distorted_points": points,
                     "aligned_points": aligned_points,
@@ -266,23 +264,28 @@ class CommissionApp(QMainWindow):
                 f_time = time.time() - st_time
                 print(
                     f"{shape_name.capitalize()} processed in: {f_time:.4f}s.{'!!!' if f_time > 0.2 else ''} "
-                    f"with MSE: {mse:.4f}"
+                    f"with {mse_text}"
                 )
-                if len(self.current_results) == 4:
+                if len(results) == 4:
                     winner_shape = min(
-                        self.current_results.keys(),
-                        key=lambda x: self.current_results[x]["mse"],
+                        results.keys(),
+                        key=lambda x: results[x]["mse"],
                     )
-                    winner_data = self.current_results[winner_shape]
+                    winner_data = results[winner_shape]
                     self.update_winner(
                         winner_shape,
                         winner_data,
                     )
-                    self.current_results = {}
+                    del self.current_results[sender]
             except Exception as e:
                 print(f"Ошибка при обработке данных: {e}")
             else:
-                self.command_queue.put("next")
+                if sender is None:
+                    self.command_queue.put("next")
+                else:
+                    self.transport.send_command("next", sender)
+            finally:
+                self.profiler.end()
 
     def update_winner(self, shape_name, figure_data):
         """
@@ -326,6 +329,23 @@ class CommissionApp(QMainWindow):
         )
         self.winner_metric_label.setText(f"Победитель: {shape_name}\nMSE: {mse:.4f}")
 
+    def get_reference(self, shape_name):
+        """
+        Возвращает эталон фигуры с индексом ближайших соседей, строя их один
+        раз: эталон не меняется между кадрами.
+        :param shape_name:
+        :return:
+        """
+        if shape_name not in self.references:
+            original_shape = self.get_original_shape(shape_name)
+            original_shape.generate_reference()
+            original_points = original_shape.points
+            self.references[shape_name] = {
+                "points": original_points,
+                "index": ShapeComparator.build_index(original_points),
+            }
+        return self.references[shape_name]
+
     def get_original_shape(self, shape_name):
         """
         Возвращает оригинальную фигуру по её имени.
@@ -348,8 +368,9 @@ class CommissionApp(QMainWindow):
         :param event:
         :return:
         """
-        self.shm.close()
-        self.shm.unlink()
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
         super().closeEvent(event)
 
 
@@ -0,0 +1,31 @@
+import os
+import socket
+
+# Единый источник настроек. Любое значение можно переопределить
+# переменной окружения, не меняя код на узлах.
+
+# Сервер BaseManager (режим по умолчанию, только один хост).
+MANAGER_HOST = os.environ.get("ROBOTS_MANAGER_HOST", "127.0.0.1")
+MANAGER_PORT = int(os.environ.get("ROBOTS_MANAGER_PORT", "50000"))
+AUTHKEY = os.environ.get("ROBOTS_AUTHKEY", "abracadabra").encode("utf-8")
+SHM_NAME = os.environ.get("ROBOTS_SHM_NAME", "robot_memory")
+
+# Транспорт: "manager", "asyncio" или "fleet" (несколько хостов).
+TRANSPORT = os.environ.get("ROBOTS_TRANSPORT", "manager")
+# Адрес, к которому подключаются клиенты, и адрес, который слушает сервер.
+# Для работы через сеть сервер запускают с ROBOTS_BIND_HOST=0.0.0.0.
+TRANSPORT_HOST = os.environ.get("ROBOTS_HOST", "127.0.0.1")
+TRANSPORT_BIND_HOST = os.environ.get("ROBOTS_BIND_HOST", TRANSPORT_HOST)
+TRANSPORT_PORT = int(os.environ.get("ROBOTS_PORT", "50001"))
+
+# Флот: имя узла роботов, число шардов комиссии и темп раундов.
+NODE_NAME = os.environ.get("ROBOTS_NODE", socket.gethostname())
+FLEET_WORKERS = int(os.environ.get("ROBOTS_FLEET_WORKERS", "2"))
+FLEET_ROUND_INTERVAL = float(os.environ.get("ROBOTS_ROUND_INTERVAL", "2"))
+
+# Сопоставление: число итераций ICP, шаг грубого этапа и устойчивый ICP,
+# не учитывающий точки на границе поля. Общие для комиссии, воркеров флота
+# и турнира.
+ICP_MAX_ITERATIONS = int(os.environ.get("ROBOTS_ICP_MAX_ITERATIONS", "50"))
+ICP_COARSE_STEP = int(os.environ.get("ROBOTS_ICP_COARSE_STEP", "8"))
+ROBUST_ICP = os.environ.get("ROBOTS_ROBUST_ICP", "0") == "1"
@@ -0,0 +1,391 @@
+import argparse
+import json
+import os
+import queue
+import subprocess
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from config import (
+    FLEET_ROUND_INTERVAL,
+    FLEET_WORKERS,
+    ICP_COARSE_STEP,
+    ICP_MAX_ITERATIONS,
+    ROBUST_ICP,
+    TRANSPORT_BIND_HOST,
+    TRANSPORT_HOST,
+    TRANSPORT_PORT,
+)
+from matching import ICP, ShapeComparator
+from profiler import FrameProfiler, parse_profile_command
+from robots import FIELD_LIMIT, ROUND_COMMAND
+from shape import Circle, Parallelogram, Square, Triangle
+from transport import (
+    MSG_DATA,
+    TransportClient,
+    TransportServer,
+    pack_message,
+    unpack_route,
+)
+
+SHAPE_CLASSES = {
+    "square": Square,
+    "triangle": Triangle,
+    "circle": Circle,
+    "parallelogram": Parallelogram,
+}
+
+ROBOTS_ROLE = "robots"
+WORKER_ROLE = "worker"
+# Через сколько раундов незавершённый раунд закрывается с тем, что пришло.
+ROUND_TIMEOUT = 2
+# Сколько run_local ждёт подключения процессов и каждого результата раунда, с.
+LOCAL_TIMEOUT = 30
+
+
+def shard_for(robot_id, shards):
+    """
+    Стабильно назначает робота шарду комиссии.
+    :param robot_id: Идентификатор робота "узел/имя".
+    :param shards: Число шардов.
+    :return: Номер шарда.
+    """
+    return zlib.crc32(robot_id.encode("utf-8")) % shards
+
+
+class FleetCoordinator(TransportServer):
+    """
+    Координатор флота: задаёт темп раундов, раздаёт кадры роботов воркерам
+    по шардам, собирает оценки и выбирает победителя раунда.
+    """
+
+    def __init__(
+        self,
+        shards=FLEET_WORKERS,
+        round_interval=FLEET_ROUND_INTERVAL,
+        host=TRANSPORT_BIND_HOST,
+        port=TRANSPORT_PORT,
+    ):
+        super().__init__(host, port)
+        self.shards = shards
+        self.round_interval = round_interval
+        self.roles = {}
+        self.workers = {}
+        self.node_robots = {}
+        self.rounds = {}
+        self.round_number = 0
+        self.wins = {}
+        self.results_queue = queue.Queue()
+
+    def on_hello(self, hello, writer):
+        super().on_hello(hello, writer)
+        role, _, name = hello.partition(":")
+        self.roles[writer] = role
+        if role == WORKER_ROLE:
+            self.workers[int(name)] = writer
+        elif role == ROBOTS_ROLE:
+            # "robots:<узел>:<id>,<id>,..." — роботы узла.
+            _, _, robot_ids = name.partition(":")
+            self.node_robots[writer] = set(filter(None, robot_ids.split(",")))
+
+    def on_disconnect(self, writer):
+        self.roles.pop(writer, None)
+        for shard, worker in list(self.workers.items()):
+            if worker is writer:
+                del self.workers[shard]
+                print(f"Воркер шарда {shard} отключён")
+
+        robot_ids = self.node_robots.pop(writer, set())
+        for round_number in sorted(self.rounds):
+            self.rounds[round_number]["expected"] -= robot_ids
+            self.check_round(round_number)
+
+    def on_data(self, payload, writer):
+        if self.roles.get(writer) == WORKER_ROLE:
+            self.on_result(json.loads(payload))
+        else:
+            self.route_frame(payload, writer)
+        self.acknowledge(writer)
+
+    def route_frame(self, payload, writer):
+        """
+        Пересылает кадр робота воркеру его шарда и отмечает робота как
+        ожидаемого в раунде кадра. Читается только заголовок маршрутизации,
+        JSON с точками разбирает воркер.
+        :param payload: Кадр с заголовком из pack_route.
+        :param writer: Соединение узла, приславшего кадр.
+        :return:
+        """
+        round_number, robot_id, _ = unpack_route(payload)
+        self.node_robots.setdefault(writer, set()).add(robot_id)
+        if round_number in self.rounds:
+            self.rounds[round_number]["expected"].add(robot_id)
+
+        shard = shard_for(robot_id, self.shards)
+        worker = self.workers.get(shard)
+        if worker is None:
+            print(f"Нет воркера для шарда {shard}, кадр {robot_id} пропущен")
+            return
+        worker.write(pack_message(MSG_DATA, payload))
+
+    def on_result(self, result):
+        current = self.rounds.get(result["round"])
+        if current is None:
+            # Раунд уже закрыт по таймауту.
+            return
+        current["results"][result["robot"]] = result
+        self.check_round(result["round"])
+
+    def check_round(self, round_number):
+        """
+        Закрывает раунд, если пришли оценки всех ожидаемых роботов.
+        :param round_number: Номер раунда.
+        :return:
+        """
+        current = self.rounds.get(round_number)
+        if current is None or not current["results"]:
+            return
+        if current["expected"] <= current["results"].keys():
+            self.finish_round(round_number)
+
+    def finish_round(self, round_number):
+        """
+        Закрывает раунд и выбирает победителя среди полученных оценок.
+        :param round_number: Номер раунда.
+        :return:
+        """
+        results = self.rounds.pop(round_number)["results"]
+        if not results:
+            print(f"Раунд {round_number}: нет результатов")
+            return
+
+        winner = min(results.values(), key=lambda result: result["mse"])
+        self.wins[winner["robot"]] = self.wins.get(winner["robot"], 0) + 1
+        print(
+            f"Раунд {round_number}: победитель {winner['robot']} ({winner['shape']}), "
+            f"MSE: {winner['mse']:.4f}, оценок: {len(results)}"
+        )
+        self.results_queue.put(
+            {"round": round_number, "winner": winner, "results": results}
+        )
+
+    def start_rounds(self):
+        self.loop.call_soon_threadsafe(self.next_round)
+
+    def next_round(self):
+        for round_number in sorted(self.rounds):
+            if round_number <= self.round_number - ROUND_TIMEOUT:
+                self.finish_round(round_number)
+
+        self.open_round()
+        self.broadcast(f"{ROUND_COMMAND} {self.round_number}")
+        self.loop.call_later(self.round_interval, self.next_round)
+
+    def open_round(self):
+        """
+        Открывает новый раунд и ожидает в нём всех роботов подключённых узлов.
+        :return: Номер раунда.
+        """
+        self.round_number += 1
+        self.rounds[self.round_number] = {
+            "expected": set().union(*self.node_robots.values()),
+            "results": {},
+        }
+        return self.round_number
+
+    def connected(self, role):
+        return sum(1 for value in list(self.roles.values()) if value == role)
+
+
+class FleetWorker:
+    """
+    Воркер комиссии: оценивает кадры роботов своего шарда и отправляет
+    результаты координатору.
+    """
+
+    def __init__(self, shard, host=TRANSPORT_HOST, port=TRANSPORT_PORT):
+        self.shard = shard
+        self.client = TransportClient(host, port, name=f"{WORKER_ROLE}:{shard}")
+        self.references = {}
+        self.profiler = FrameProfiler(f"worker{shard}")
+
+    def get_reference(self, shape_name):
+        if shape_name not in self.references:
+            shape = SHAPE_CLASSES[shape_name]()
+            shape.generate_reference()
+            self.references[shape_name] = (
+                shape.points,
+                ShapeComparator.build_index(shape.points),
+            )
+        return self.references[shape_name]
+
+    def score(self, payload):
+        """
+        Выравнивает кадр по эталону и возвращает оценку.
+        :param payload: Кадр робота с заголовком из pack_route.
+        :return: Словарь с роботом, раундом, фигурой и MSE.
+        """
+        round_number, robot_id, offset = unpack_route(payload)
+        data = json.loads(payload[offset:])
+        original_points, index = self.get_reference(data["shape"])
+        points = np.array(data["points"], dtype=np.float64)
+        if ROBUST_ICP:
+            mse = ICP.robust_icp_align(
+                original_points,
+                points,
+                max_iterations=ICP_MAX_ITERATIONS,
+                clip_limit=FIELD_LIMIT,
+                index=index,
+            )["mse"]
+        else:
+            _, mse = ICP.icp_align(
+                original_points,
+                points,
+                max_iterations=ICP_MAX_ITERATIONS,
+                coarse_step=ICP_COARSE_STEP,
+                index=index,
+            )
+        return {
+            "robot": robot_id,
+            "round": round_number,
+            "shape": data["shape"],
+            "mse": float(mse),
+        }
+
+    def run(self):
+        while True:
+            try:
+                self.client.connect()
+                break
+            except ConnectionRefusedError:
+                print("Ожидание подключения к координатору...")
+                time.sleep(1)
+        print(f"Воркер шарда {self.shard} подключён")
+
+        while self.client.sock is not None:
+            while not self.client.command_queue.empty():
+                frames = parse_profile_command(self.client.command_queue.get())
+                if frames is not None:
+                    self.profiler.request(frames)
+
+            try:
+                payload = self.client.inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            self.profiler.begin()
+            try:
+                result = self.score(payload)
+            except Exception as e:
+                print(f"Ошибка при обработке данных: {e}")
+            else:
+                self.client.data_queue.put(json.dumps(result).encode("utf-8"))
+            finally:
+                self.profiler.end()
+
+
+def run_local(nodes, shards, rounds, round_interval, timeout=LOCAL_TIMEOUT):
+    """
+    Поднимает весь флот на одной машине через loopback: координатор в этом
+    процессе, воркеры и узлы роботов — отдельными процессами.
+    :param nodes: Число процессов-узлов с роботами.
+    :param shards: Число воркеров комиссии.
+    :param rounds: Сколько раундов провести.
+    :param round_interval: Интервал между раундами, с.
+    :param timeout: Сколько ждать подключения процессов и каждого раунда, с.
+    :return: Словарь побед по роботам за проведённые раунды.
+    """
+    coordinator = FleetCoordinator(shards, round_interval, host="127.0.0.1", port=0)
+    coordinator.start()
+
+    directory = os.path.dirname(os.path.abspath(__file__))
+    env = dict(
+        os.environ,
+        ROBOTS_TRANSPORT="fleet",
+        ROBOTS_HOST="127.0.0.1",
+        ROBOTS_PORT=str(coordinator.port),
+    )
+    processes = [
+        subprocess.Popen(
+            [sys.executable, os.path.join(directory, "fleet.py"), "worker", str(shard)],
+            env=env,
+        )
+        for shard in range(shards)
+    ] + [
+        subprocess.Popen(
+            [sys.executable, os.path.join(directory, "robots.py")],
+            env=dict(env, ROBOTS_NODE=f"node{node}"),
+        )
+        for node in range(nodes)
+    ]
+
+    wins = {}
+    try:
+        deadline = time.time() + timeout
+        while (
+            coordinator.connected(WORKER_ROLE) < shards
+            or coordinator.connected(ROBOTS_ROLE) < nodes
+        ):
+            if any(process.poll() is not None for process in processes):
+                raise RuntimeError("Процесс флота завершился до начала раундов")
+            if time.time() > deadline:
+                raise TimeoutError("Процессы флота не подключились вовремя")
+            time.sleep(0.1)
+
+        coordinator.start_rounds()
+        for _ in range(rounds):
+            try:
+                result = coordinator.results_queue.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError("Раунд не завершился вовремя") from None
+            robot_id = result["winner"]["robot"]
+            wins[robot_id] = wins.get(robot_id, 0) + 1
+    finally:
+        coordinator.stop()
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+    return wins
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Флот роботов на нескольких узлах")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    coordinator_parser = subparsers.add_parser("coordinator")
+    coordinator_parser.add_argument("--shards", type=int, default=FLEET_WORKERS)
+
+    worker_parser = subparsers.add_parser("worker")
+    worker_parser.add_argument("shard", type=int)
+
+    local_parser = subparsers.add_parser("local")
+    local_parser.add_argument("--nodes", type=int, default=2)
+    local_parser.add_argument("--shards", type=int, default=FLEET_WORKERS)
+    local_parser.add_argument("--rounds", type=int, default=5)
+    local_parser.add_argument("--interval", type=float, default=FLEET_ROUND_INTERVAL)
+
+    args = parser.parse_args()
+
+    if args.mode == "coordinator":
+        fleet = FleetCoordinator(args.shards)
+        fleet.start()
+        fleet.start_rounds()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("Завершение работы координатора...")
+    elif args.mode == "worker":
+        try:
+            FleetWorker(args.shard).run()
+        except KeyboardInterrupt:
+            print("Завершение работы воркера...")
+    else:
+        wins = run_local(args.nodes, args.shards, args.rounds, args.interval)
+        for robot_id, count in sorted(wins.items()):
+            print(f"{robot_id}: побед {count}")
@@ -2,6 +2,8 @@
 from multiprocessing.managers import BaseManager
 from multiprocessing import Queue
 
+from config import AUTHKEY, MANAGER_HOST, MANAGER_PORT
+
 # Создаём очередь
 queue = Queue()
 
@@ -15,7 +17,7 @@ QueueManager.register('get_queue', callable=lambda: queue)
 
 if __name__ == "__main__":
     # Запускаем сервер менеджера
-    manager = QueueManager(address=('127.0.0.1', 50000), authkey=b'abracadabra')
+    manager = QueueManager(address=(MANAGER_HOST, MANAGER_PORT), authkey=AUTHKEY)
     server = manager.get_server()
-    print("Сервер менеджера запущен на 127.0.0.1:50000")
+    print(f"Сервер менеджера запущен на {MANAGER_HOST}:{MANAGER_PORT}")
     server.serve_forever()
\ No newline at end of file
@@ -0,0 +1,220 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class ShapeComparator:
+    @staticmethod
+    def build_index(original_points):
+        """
+        Строит индекс ближайших соседей по оригинальным точкам.
+        Индекс можно переиспользовать для всех кадров одной фигуры.
+        :param original_points: Оригинальные точки (N x 2).
+        :return: KD-дерево по оригинальным точкам.
+        """
+        return cKDTree(original_points)
+
+    @staticmethod
+    def query(original_points, distorted_points, index=None):
+        """
+        Находит расстояния и индексы ближайших оригинальных точек.
+        :param original_points: Оригинальные точки (N x 2).
+        :param distorted_points: Искажённые точки (M x 2).
+        :param index: Готовый индекс из build_index (опционально).
+        :return: Расстояния (M,) и индексы (M,) ближайших точек.
+        """
+        if index is None:
+            index = ShapeComparator.build_index(original_points)
+        return index.query(distorted_points)
+
+    @staticmethod
+    def find_closest_points(original_points, distorted_points, index=None):
+        """
+        Находит ближайшие точки между двумя наборами.
+        :param original_points: Оригинальные точки (N x 2).
+        :param distorted_points: Искажённые точки (M x 2).
+        :param index: Готовый индекс из build_index (опционально).
+        :return: Ближайшие точки из оригинального набора.
+        """
+        _, indices = ShapeComparator.query(original_points, distorted_points, index)
+        return original_points[indices]
+
+    @staticmethod
+    def calculate_mse(original_points, distorted_points, index=None):
+        """
+        Вычисляет среднеквадратичную ошибку (MSE).
+        :param original_points: Оригинальные точки (N x 2).
+        :param distorted_points: Искажённые точки (M x 2).
+        :param index: Готовый индекс из build_index (опционально).
+        :return: Среднеквадратичная ошибка.
+        """
+        distances, _ = ShapeComparator.query(original_points, distorted_points, index)
+        return np.mean(distances**2)
+
+
+class ICP:
+    @staticmethod
+    def best_fit_transform(source_points, target_points):
+        """
+        Находит поворот и сдвиг, переводящие source_points в target_points
+        с наименьшей суммой квадратов расстояний.
+        :param source_points: Выравниваемые точки (M x 2).
+        :param target_points: Соответствующие им точки (M x 2).
+        :return: Матрица поворота (2 x 2) и вектор сдвига (2,).
+        """
+        centroid_target = np.mean(target_points, axis=0)
+        centroid_source = np.mean(source_points, axis=0)
+
+        centered_target = target_points - centroid_target
+        centered_source = source_points - centroid_source
+
+        H = np.dot(centered_source.T, centered_target)
+
+        U, _, Vt = np.linalg.svd(H)
+
+        R = np.dot(Vt.T, U.T)
+
+        t = centroid_target - np.dot(R, centroid_source)
+
+        return R, t
+
+    @staticmethod
+    def icp_align(
+        original_points,
+        distorted_points,
+        max_iterations=50,
+        mse_threshold=0.10,
+        coarse_step=1,
+        index=None,
+    ):
+        """
+        Выравнивает искажённые точки относительно оригинальных с использованием ICP.
+        Перед первой итерацией центроид искажённых точек совмещается с
+        центроидом оригинала. При coarse_step > 1 сначала идут дешёвые
+        итерации по каждой coarse_step-й точке, затем уточнение по всем.
+        :param original_points: Оригинальные точки (N x 2).
+        :param distorted_points: Искажённые точки (M x 2).
+        :param max_iterations: Максимальное число итераций на каждом этапе.
+        :param mse_threshold: Порог MSE для остановки.
+        :param coarse_step: Шаг прореживания точек на грубом этапе.
+        :param index: Готовый индекс из ShapeComparator.build_index (опционально).
+        :return: Выровненные точки и MSE.
+        """
+        if index is None:
+            index = ShapeComparator.build_index(original_points)
+
+        mse = float("inf")
+        aligned_points = (
+            distorted_points
+            - np.mean(distorted_points, axis=0)
+            + np.mean(original_points, axis=0)
+        )
+
+        for step in sorted({coarse_step, 1}, reverse=True):
+            for _ in range(max_iterations):
+                # Один запрос к индексу даёт и соответствия, и MSE.
+                distances, indices = index.query(aligned_points[::step])
+                mse = np.mean(distances**2)
+
+                if mse < mse_threshold:
+                    break
+
+                R, t = ICP.best_fit_transform(
+                    aligned_points[::step], original_points[indices]
+                )
+                aligned_points = np.dot(aligned_points, R.T) + t
+            else:
+                # Итерации кончились: MSE считаем для итоговых точек.
+                distances, _ = index.query(aligned_points[::step])
+                mse = np.mean(distances**2)
+
+        return aligned_points, mse
+
+    @staticmethod
+    def robust_icp_align(
+        original_points,
+        distorted_points,
+        max_iterations=50,
+        mse_threshold=0.10,
+        clip_limit=None,
+        weighted=False,
+        index=None,
+    ):
+        """
+        Устойчивый вариант ICP для обрезанных кадров. Точки, упёршиеся в
+        границу поля (|x| или |y| не меньше clip_limit), лежат на границе, а
+        не на фигуре, поэтому в соответствия не входят: выравнивание и порог
+        MSE считаются по остальным точкам (inliers). При weighted=True inliers
+        взвешиваются как 1 / (1 + d^2 / s^2), где s^2 — MSE inliers.
+        :param original_points: Оригинальные точки (N x 2).
+        :param distorted_points: Искажённые точки (M x 2).
+        :param max_iterations: Максимальное число итераций.
+        :param mse_threshold: Порог MSE inliers для остановки.
+        :param clip_limit: Граница поля, по которой обрезан кадр (None — все
+            точки считаются inliers).
+        :param weighted: Взвешивать соответствия по расстоянию.
+        :param index: Готовый индекс из ShapeComparator.build_index (опционально).
+        :return: Словарь: aligned_points, mse (по всем точкам),
+            inlier_mse (по inliers) и iterations — число применённых
+            преобразований. Обе MSE относятся к возвращаемым точкам.
+        """
+        if index is None:
+            index = ShapeComparator.build_index(original_points)
+
+        inliers = np.ones(len(distorted_points), dtype=bool)
+        if clip_limit is not None:
+            inliers = np.all(np.abs(distorted_points) < clip_limit, axis=1)
+            if np.count_nonzero(inliers) < 3:
+                # Кадр почти целиком на границе: выравниваем по всем точкам.
+                inliers[:] = True
+
+        aligned_points = (
+            distorted_points
+            - np.mean(distorted_points[inliers], axis=0)
+            + np.mean(original_points, axis=0)
+        )
+        iterations = 0
+
+        for _ in range(max_iterations):
+            distances, indices = index.query(aligned_points)
+            closest_points = original_points[indices]
+            inlier_mse = np.mean(distances[inliers] ** 2)
+
+            if inlier_mse < mse_threshold:
+                break
+
+            weights = inliers.astype(np.float64)
+            if weighted:
+                weights /= 1 + distances**2 / max(inlier_mse, 1e-12)
+            weights /= np.sum(weights)
+
+            centroid_original = np.dot(weights, closest_points)
+            centroid_distorted = np.dot(weights, aligned_points)
+
+            centered_original = closest_points - centroid_original
+            centered_distorted = aligned_points - centroid_distorted
+
+            H = np.dot((centered_distorted * weights[:, None]).T, centered_original)
+
+            U, _, Vt = np.linalg.svd(H)
+
+            R = np.dot(Vt.T, U.T)
+            if np.linalg.det(R) < 0:
+                # Исключаем отражение: оно не является движением фигуры.
+                Vt[-1] *= -1
+                R = np.dot(Vt.T, U.T)
+
+            t = centroid_original - np.dot(R, centroid_distorted)
+
+            aligned_points = np.dot(aligned_points, R.T) + t
+            iterations += 1
+        else:
+            # Итерации кончились: MSE считаем для итоговых точек.
+            distances, _ = index.query(aligned_points)
+            inlier_mse = np.mean(distances[inliers] ** 2)
+
+        return {
+            "aligned_points": aligned_points,
+            "mse": np.mean(distances**2),
+            "inlier_mse": inlier_mse,
+            "iterations": iterations,
+        }
@@ -0,0 +1,79 @@
+import cProfile
+import os
+
+PROFILE_COMMAND = "profile"
+PROFILE_DIR = "profiles"
+
+
+def parse_profile_command(command):
+    """
+    Разбирает команду вида "profile N".
+    :param command: Строка команды.
+    :return: Число кадров N или None, если это не команда профилирования.
+    """
+    name, _, frames = command.partition(" ")
+    if name != PROFILE_COMMAND:
+        return None
+    try:
+        return max(int(frames), 1)
+    except ValueError:
+        print(f"Некорректная команда профилирования: {command}")
+        return None
+
+
+class FrameProfiler:
+    """
+    Профилирует следующие N кадров процесса без его перезапуска.
+    Пока профилирование не запрошено, begin()/end() сводятся к проверке
+    одного атрибута и счётчику кадров.
+    """
+
+    def __init__(self, process_name):
+        self.process_name = process_name
+        self.frame = 0
+        self.profile = None
+        self.first_frame = 0
+        self.remaining = 0
+
+    def request(self, frames):
+        """
+        Включает профилирование следующих кадров.
+        :param frames: Число кадров.
+        :return:
+        """
+        # Уже снятые кадры сохраняем, а захват без кадров просто перезапускаем.
+        if self.profile is not None and self.frame > self.first_frame:
+            self.dump()
+        self.profile = cProfile.Profile()
+        self.first_frame = self.frame
+        self.remaining = frames
+        print(f"Профилирование {self.process_name}: {frames} кадров")
+
+    def begin(self):
+        if self.profile is not None:
+            self.profile.enable()
+
+    def end(self):
+        self.frame += 1
+        if self.profile is None:
+            return
+        self.profile.disable()
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self.dump()
+
+    def dump(self):
+        """
+        Сохраняет собранную статистику и выключает профилирование.
+        :return: Имя файла со статистикой.
+        """
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        filename = os.path.join(
+            PROFILE_DIR,
+            f"{self.process_name}_{os.getpid()}_"
+            f"{self.first_frame:06d}-{self.frame - 1:06d}.prof",
+        )
+        self.profile.dump_stats(filename)
+        self.profile = None
+        print(f"Профиль сохранён: {filename}")
+        return filename
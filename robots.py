@@ -5,9 +5,16 @@ from multiprocessing.shared_memory import SharedMemory
 
 import numpy as np
 
+from config import AUTHKEY, MANAGER_HOST, MANAGER_PORT, NODE_NAME, SHM_NAME, TRANSPORT
+from profiler import FrameProfiler, parse_profile_command
 from shape import Circle, Parallelogram, Square, Triangle
+from transport import TransportClient, pack_route
 
 GENERATION_INTERVAL = 2
+# Граница поля: сдвинутые за неё точки прижимаются к краю.
+FIELD_LIMIT = 100
+# Команда координатора флота: "round N" — сгенерировать кадры раунда N.
+ROUND_COMMAND = "round"
 
 
 class Robot:
@@ -17,30 +24,36 @@ class Robot:
         self.shape.generate_reference()
         self.points = self.shape.points.astype(np.float64)
 
-    def generate_distorted_shape(self):
-        shape = self.shape.__class__()
-        shape.generate_reference()
-        self.points = shape.points.astype(np.float64)
+    def generate_distorted_shape(self, rng=None):
+        """
+        Генерирует искажённый кадр.
+        :param rng: Генератор случайных чисел (по умолчанию — глобальный np.random).
+        :return:
+        """
+        if rng is None:
+            rng = np.random
+        # Эталон не меняется между кадрами, поэтому берём готовые точки.
+        self.points = self.shape.points.astype(np.float64)
 
-        self.points = self.thin_points(self.points, percent=10)
-        self.points = self.add_noise(self.points, scale=0.3)
-        self.points = self.rotate_points(self.points, angle=np.random.uniform(0, 360))
+        self.points = self.thin_points(self.points, percent=10, rng=rng)
+        self.points = self.add_noise(self.points, scale=0.3, rng=rng)
+        self.points = self.rotate_points(self.points, angle=rng.uniform(0, 360))
         self.points = self.shift_points(
             self.points,
-            shift_x=np.random.uniform(-50, 50),
-            shift_y=np.random.uniform(-50, 50),
+            shift_x=rng.uniform(-50, 50),
+            shift_y=rng.uniform(-50, 50),
         )
 
     @staticmethod
-    def thin_points(points, percent=10):
+    def thin_points(points, percent=10, rng=np.random):
         num_points = len(points)
         num_to_remove = int(num_points * percent / 100)
-        indices_to_remove = np.random.choice(num_points, num_to_remove, replace=False)
+        indices_to_remove = rng.choice(num_points, num_to_remove, replace=False)
         return np.delete(points, indices_to_remove, axis=0)
 
     @staticmethod
-    def add_noise(points, scale=0.3):
-        noise = np.random.normal(0, scale, points.shape)
+    def add_noise(points, scale=0.3, rng=np.random):
+        noise = rng.normal(0, scale, points.shape)
         return points + noise
 
     @staticmethod
@@ -54,11 +67,15 @@ class Robot:
     @staticmethod
     def shift_points(points, shift_x, shift_y):
         shifted_points = points + np.array([shift_x, shift_y])
-        return np.clip(shifted_points, -100, 100)
+        return np.clip(shifted_points, -FIELD_LIMIT, FIELD_LIMIT)
 
-    def send_data(self, queue, shm):
+    def send_data(self, queue, shm=None, header=b""):
         data = {"shape": self.shape.name, "points": self.points.tolist()}
         serialized_data = json.dumps(data).encode("utf-8")
+        if shm is None:
+            # Сетевой транспорт: кадр идёт внутри сообщения.
+            queue.put(header + serialized_data)
+            return
         shm.buf[: len(serialized_data)] = serialized_data
         queue.put(len(serialized_data))
 
@@ -70,25 +87,75 @@ class Robots:
         self.shm = None
         self.robots = [Glasha(), Sasha(), Masha(), Natasha()]
         self.is_running = False
+        self.profiler = FrameProfiler("robots")
 
     def connect_to_server(self):
+        if TRANSPORT in ("asyncio", "fleet"):
+            self.connect_to_transport()
+            return
+
         BaseManager.register("get_data_queue")
         BaseManager.register("get_command_queue")
 
         while True:
             try:
                 manager = BaseManager(
-                    address=("127.0.0.1", 50000), authkey=b"abracadabra"
+                    address=(MANAGER_HOST, MANAGER_PORT), authkey=AUTHKEY
                 )
                 manager.connect()
                 self.data_queue = manager.get_data_queue()  # type: ignore
                 self.command_queue = manager.get_command_queue()  # type: ignore
-                self.shm = SharedMemory(name="robot_memory")
+                self.shm = SharedMemory(name=SHM_NAME)
                 break
             except (ConnectionRefusedError, FileNotFoundError):
                 print("Ожидание подключения к серверу...")
                 time.sleep(1)
 
+    def connect_to_transport(self):
+        # Координатор флота заранее узнаёт, каких роботов ждать в раунде.
+        robot_ids = ",".join(self.robot_id(robot) for robot in self.robots)
+        client = TransportClient(name=f"robots:{NODE_NAME}:{robot_ids}")
+        while True:
+            try:
+                client.connect()
+                break
+            except ConnectionRefusedError:
+                print("Ожидание подключения к серверу...")
+                time.sleep(1)
+        self.data_queue = client.data_queue
+        self.command_queue = client.command_queue
+
+    def handle_command(self, command):
+        if command == "start":
+            self.is_running = True
+        elif command == "stop":
+            self.is_running = False
+        elif command.startswith(f"{ROUND_COMMAND} "):
+            self.play_round(int(command.split()[1]))
+        else:
+            frames = parse_profile_command(command)
+            if frames is not None:
+                self.profiler.request(frames)
+
+    @staticmethod
+    def robot_id(robot):
+        return f"{NODE_NAME}/{robot.name}"
+
+    def play_round(self, round_number):
+        """
+        Отправляет по кадру от каждого робота с меткой раунда (режим флота).
+        :param round_number: Номер раунда от координатора.
+        :return:
+        """
+        for robot in self.robots:
+            self.profiler.begin()
+            robot.generate_distorted_shape()
+            robot.send_data(
+                self.data_queue,
+                header=pack_route(round_number, self.robot_id(robot)),
+            )
+            self.profiler.end()
+
     def run(self):
         self.connect_to_server()
         print("Подключение к серверу установлено.")
@@ -96,24 +163,24 @@ class Robots:
         try:
             while True:
                 if not self.command_queue.empty():
-                    command = self.command_queue.get()
-                    if command == "start":
-                        self.is_running = True
-                    elif command == "stop":
-                        self.is_running = False
+                    self.handle_command(self.command_queue.get())
+                elif not self.is_running:
+                    time.sleep(0.01)
 
                 if self.is_running:
                     for robot in self.robots:
+                        self.profiler.begin()
                         robot.generate_distorted_shape()
                         robot.send_data(self.data_queue, self.shm)
+                        self.profiler.end()
 
                         while True:
                             if not self.command_queue.empty():
                                 command = self.command_queue.get()
                                 if command == "next":
                                     break
-                                elif command == "stop":
-                                    self.is_running = False
+                                self.handle_command(command)
+                                if not self.is_running:
                                     break
                             time.sleep(0.01)
 
@@ -121,7 +188,8 @@ class Robots:
         except (KeyboardInterrupt, OSError):
             print("Завершение работы Robots...")
         finally:
-            self.shm.close()
+            if self.shm is not None:
+                self.shm.close()
 
 
 class Glasha(Robot):
@@ -3,6 +3,7 @@ from multiprocessing.managers import BaseManager
 from multiprocessing.shared_memory import SharedMemory
 import json
 import numpy as np
+from config import AUTHKEY, MANAGER_HOST, MANAGER_PORT, SHM_NAME
 from shape import Square, Triangle, Circle, Parallelogram
 
 SHAPE_CLASSES = {
@@ -20,11 +21,11 @@ QueueManager.register('get_queue')
 def receive_data():
     print("Receiving data")
 
-    manager = QueueManager(address=('127.0.0.1', 50000), authkey=b'abracadabra')
+    manager = QueueManager(address=(MANAGER_HOST, MANAGER_PORT), authkey=AUTHKEY)
     manager.connect()
     queue = manager.get_queue()
 
-    shm = SharedMemory(name="robot_memory")
+    shm = SharedMemory(name=SHM_NAME)
 
     try:
         while True:
@@ -1,6 +1,7 @@
 import time
 from multiprocessing.managers import BaseManager
 from multiprocessing.shared_memory import SharedMemory
+from config import AUTHKEY, MANAGER_HOST, MANAGER_PORT, SHM_NAME
 from robots import Glasha, Sasha, Masha, Natasha
 
 class QueueManager(BaseManager):
@@ -9,7 +10,7 @@ class QueueManager(BaseManager):
 QueueManager.register('get_queue')
 
 def run_robots():
-    manager = QueueManager(address=('127.0.0.1', 50000), authkey=b'abracadabra')
+    manager = QueueManager(address=(MANAGER_HOST, MANAGER_PORT), authkey=AUTHKEY)
     manager.connect()
     queue = manager.get_queue()
 
@@ -18,7 +19,7 @@ def run_robots():
     masha = Masha()
     natasha = Natasha()
 
-    shm = SharedMemory(name="robot_memory", create=True, size=262144)
+    shm = SharedMemory(name=SHM_NAME, create=True, size=262144)
 
     try:
         print("Ожидание 5 секунд перед отправкой данных...")
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+import fleet
+from fleet import FleetCoordinator, FleetWorker, run_local
+from transport import pack_route, unpack_route
+
+
+class FakeWriter:
+    def __init__(self):
+        self.messages = []
+
+    def write(self, message):
+        self.messages.append(message)
+
+
+def frame(robot_id, round_number, points=()):
+    body = json.dumps({"shape": "square", "points": list(points)})
+    return pack_route(round_number, robot_id) + body.encode("utf-8")
+
+
+def result(robot_id, round_number, mse):
+    return {"robot": robot_id, "round": round_number, "shape": "square", "mse": mse}
+
+
+def make_coordinator():
+    coordinator = FleetCoordinator(shards=1)
+    coordinator.on_hello("worker:0", FakeWriter())
+    return coordinator
+
+
+def test_round_waits_for_robots_announced_in_hello():
+    coordinator = make_coordinator()
+    node0, node1 = FakeWriter(), FakeWriter()
+    coordinator.on_hello("robots:node0:node0/A", node0)
+    coordinator.on_hello("robots:node1:node1/B", node1)
+    round_number = coordinator.open_round()
+
+    coordinator.route_frame(frame("node0/A", round_number), node0)
+    coordinator.on_result(result("node0/A", round_number, 0.5))
+    assert coordinator.results_queue.empty()
+
+    coordinator.route_frame(frame("node1/B", round_number), node1)
+    coordinator.on_result(result("node1/B", round_number, 0.1))
+
+    closed = coordinator.results_queue.get_nowait()
+    assert closed["winner"]["robot"] == "node1/B"
+    assert len(closed["results"]) == 2
+
+
+def test_routed_frame_is_expected_in_its_round():
+    coordinator = make_coordinator()
+    node = FakeWriter()
+    coordinator.on_hello("robots:node0:", node)
+    round_number = coordinator.open_round()
+
+    coordinator.route_frame(frame("node0/A", round_number), node)
+    coordinator.route_frame(frame("node0/B", round_number), node)
+    coordinator.on_result(result("node0/A", round_number, 0.5))
+    assert coordinator.results_queue.empty()
+
+    coordinator.on_result(result("node0/B", round_number, 0.7))
+    assert coordinator.results_queue.get_nowait()["winner"]["robot"] == "node0/A"
+
+
+def test_disconnected_node_is_not_waited_for():
+    coordinator = make_coordinator()
+    node0, node1 = FakeWriter(), FakeWriter()
+    coordinator.on_hello("robots:node0:node0/A", node0)
+    coordinator.on_hello("robots:node1:node1/B", node1)
+    round_number = coordinator.open_round()
+
+    coordinator.route_frame(frame("node0/A", round_number), node0)
+    coordinator.on_result(result("node0/A", round_number, 0.5))
+    coordinator.on_disconnect(node1)
+
+    assert coordinator.results_queue.get_nowait()["winner"]["robot"] == "node0/A"
+    next_round = coordinator.open_round()
+    assert coordinator.rounds[next_round]["expected"] == {"node0/A"}
+
+
+def test_local_fleet_on_loopback():
+    wins = run_local(nodes=2, shards=2, rounds=2, round_interval=0.5)
+
+    assert sum(wins.values()) == 2
+    assert all(robot_id.split("/")[0] in ("node0", "node1") for robot_id in wins)
+
+
+def test_route_header_is_read_without_the_body():
+    payload = frame("node0/Глаша", 7) + b"not json"
+
+    round_number, robot_id, offset = unpack_route(payload)
+
+    assert (round_number, robot_id) == (7, "node0/Глаша")
+    assert payload[offset:].startswith(b"{")
+
+
+@pytest.mark.parametrize("robust", [False, True])
+def test_worker_scores_routed_frame(monkeypatch, robust):
+    monkeypatch.setattr(fleet, "ROBUST_ICP", robust)
+    worker = FleetWorker(shard=0)
+    points, _ = worker.get_reference("square")
+
+    scored = worker.score(frame("node0/A", 3, points.tolist()))
+
+    assert scored["robot"] == "node0/A"
+    assert scored["round"] == 3
+    assert scored["mse"] < 1e-12
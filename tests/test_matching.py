@@ -0,0 +1,78 @@
+import numpy as np
+
+from matching import ICP, ShapeComparator
+from robots import FIELD_LIMIT, Robot
+from shape import Square
+
+
+def square_points():
+    square = Square()
+    square.generate_reference()
+    return square.points.astype(np.float64)
+
+
+def test_coarse_icp_reaches_threshold():
+    points = square_points()
+    moved = Robot.shift_points(Robot.rotate_points(points, 20), 40, -30)
+
+    _, mse = ICP.icp_align(points, moved, coarse_step=8)
+
+    assert mse < 0.10
+
+
+def test_icp_mse_describes_returned_points():
+    points = square_points()
+    moved = Robot.rotate_points(points, 30)
+
+    aligned, mse = ICP.icp_align(points, moved, max_iterations=2)
+
+    assert mse == ShapeComparator.calculate_mse(points, aligned)
+
+
+def test_robust_icp_counts_applied_updates():
+    points = square_points()
+    moved = Robot.rotate_points(points, 30)
+
+    one = ICP.robust_icp_align(points, moved, max_iterations=1)
+    limited = ICP.robust_icp_align(points, moved, max_iterations=3)
+
+    assert one["iterations"] == 1
+    assert limited["iterations"] == 3
+
+
+def test_robust_icp_reports_zero_updates_for_aligned_cloud():
+    points = square_points()
+
+    result = ICP.robust_icp_align(points, points)
+
+    assert result["iterations"] == 0
+    assert result["mse"] == 0
+
+
+def test_robust_icp_ignores_points_clamped_to_field_limit():
+    points = square_points()
+    clipped = Robot.shift_points(Robot.rotate_points(points, 20), 93, 0)
+    unclamped = np.all(np.abs(clipped) < FIELD_LIMIT, axis=1)
+
+    plain = ICP.robust_icp_align(points, clipped)
+    robust = ICP.robust_icp_align(points, clipped, clip_limit=FIELD_LIMIT)
+
+    assert robust["iterations"] < plain["iterations"]
+    assert robust["inlier_mse"] < 0.10
+    pose_error = ShapeComparator.calculate_mse(
+        points, robust["aligned_points"][unclamped]
+    )
+    assert pose_error < ShapeComparator.calculate_mse(
+        points, plain["aligned_points"][unclamped]
+    )
+
+
+def test_robust_icp_mse_describes_returned_points():
+    points = square_points()
+    moved = Robot.rotate_points(points, 30)
+
+    result = ICP.robust_icp_align(points, moved, max_iterations=3)
+
+    assert result["mse"] == ShapeComparator.calculate_mse(
+        points, result["aligned_points"]
+    )
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+import profiler
+from profiler import FrameProfiler, parse_profile_command
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def play(frame_profiler, frames):
+    for _ in range(frames):
+        frame_profiler.begin()
+        sum(range(100))
+        frame_profiler.end()
+
+
+@pytest.mark.parametrize(
+    "command, frames",
+    [
+        ("profile 20", 20),
+        ("profile 0", 1),
+        ("profile", None),
+        ("profile many", None),
+        ("start", None),
+        ("next", None),
+    ],
+)
+def test_parse_profile_command(command, frames):
+    assert parse_profile_command(command) == frames
+
+
+def test_dumps_after_exactly_n_frames(profile_dir):
+    frame_profiler = FrameProfiler("robots")
+    play(frame_profiler, 2)
+
+    frame_profiler.request(3)
+    play(frame_profiler, 2)
+    assert not os.listdir(profile_dir)
+
+    play(frame_profiler, 1)
+    assert os.listdir(profile_dir) == [f"robots_{os.getpid()}_000002-000004.prof"]
+    assert frame_profiler.profile is None
+
+    play(frame_profiler, 1)
+    assert len(os.listdir(profile_dir)) == 1
+
+
+def test_request_during_capture_saves_captured_frames(profile_dir):
+    frame_profiler = FrameProfiler("commission")
+    frame_profiler.request(5)
+    play(frame_profiler, 2)
+
+    frame_profiler.request(1)
+    play(frame_profiler, 1)
+
+    assert sorted(os.listdir(profile_dir)) == [
+        f"commission_{os.getpid()}_000000-000001.prof",
+        f"commission_{os.getpid()}_000002-000002.prof",
+    ]
+
+
+def test_repeated_request_before_first_frame_writes_no_empty_range(profile_dir):
+    frame_profiler = FrameProfiler("worker0")
+    play(frame_profiler, 5)
+
+    frame_profiler.request(3)
+    frame_profiler.request(2)
+    play(frame_profiler, 2)
+
+    assert os.listdir(profile_dir) == [f"worker0_{os.getpid()}_000005-000006.prof"]
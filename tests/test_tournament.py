@@ -0,0 +1,53 @@
+import pytest
+
+import tournament
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(tournament, "ROUNDS_PER_CHUNK", 2)
+
+
+def test_tournament_counts_every_round(tmp_path):
+    checkpoint = tmp_path / "tournament.json"
+    stats = tournament.run_tournament(
+        5, workers=1, max_iterations=5, checkpoint=str(checkpoint)
+    )
+
+    assert stats.rounds == 5
+    assert sum(stats.wins) == 5
+    assert all(sum(histogram) == 5 for histogram in stats.histogram)
+
+
+def test_resume_of_finished_tournament_adds_nothing(tmp_path):
+    checkpoint = str(tmp_path / "tournament.json")
+    tournament.run_tournament(5, workers=1, max_iterations=5, checkpoint=checkpoint)
+
+    stats = tournament.run_tournament(
+        5, workers=1, max_iterations=5, checkpoint=checkpoint
+    )
+
+    assert stats.rounds == 5
+    assert stats.completed == {0, 1, 2}
+
+
+@pytest.mark.parametrize("rounds", [3, 10])
+def test_resume_with_other_round_count_is_rejected(tmp_path, rounds):
+    checkpoint = str(tmp_path / "tournament.json")
+    tournament.run_tournament(5, workers=1, max_iterations=5, checkpoint=checkpoint)
+
+    with pytest.raises(ValueError):
+        tournament.run_tournament(
+            rounds, workers=1, max_iterations=5, checkpoint=checkpoint
+        )
+
+
+def test_seeds_do_not_share_shifted_chunks():
+    tournament.init_worker()
+
+    _, first = tournament.play_chunk(1, 2, seed=0, max_iterations=5)
+    _, shifted = tournament.play_chunk(0, 2, seed=1, max_iterations=5)
+    _, again = tournament.play_chunk(1, 2, seed=0, max_iterations=5)
+
+    assert first["mse_sum"] != shifted["mse_sum"]
+    assert first["mse_sum"] == again["mse_sum"]
@@ -0,0 +1,144 @@
+import socket
+import threading
+import time
+
+import pytest
+
+import transport
+from transport import ACK_BATCH, SEND_WINDOW, TransportClient, TransportServer
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError("Условие не выполнено за отведённое время")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def server():
+    server = TransportServer(host="127.0.0.1", port=0)
+    server.start()
+    return server
+
+
+def connect(server, name="robots"):
+    client = TransportClient("127.0.0.1", server.port, name=name)
+    client.connect()
+    wait_for(lambda: len(server.writers) > 0)
+    return client
+
+
+def test_start_raises_when_port_is_busy():
+    busy = socket.socket()
+    busy.bind(("127.0.0.1", 0))
+    busy.listen()
+    try:
+        server = TransportServer(host="127.0.0.1", port=busy.getsockname()[1])
+        with pytest.raises(OSError):
+            server.start()
+    finally:
+        busy.close()
+
+
+def test_next_goes_only_to_sender(server):
+    first = connect(server, "robots:first")
+    second = connect(server, "robots:second")
+    wait_for(lambda: len(server.writers) == 2)
+
+    first.data_queue.put(b"frame")
+    payload, sender = server.data_queue.get(timeout=2)
+    assert payload == b"frame"
+
+    server.send_command("next", sender)
+    wait_for(lambda: not first.command_queue.empty())
+    assert first.command_queue.get() == "next"
+    time.sleep(0.1)
+    assert second.command_queue.empty()
+
+
+def test_broadcast_reaches_all_clients(server):
+    clients = [connect(server, f"robots:{i}") for i in range(3)]
+    wait_for(lambda: len(server.writers) == 3)
+
+    server.command_queue.put("start")
+    for client in clients:
+        wait_for(lambda: not client.command_queue.empty())
+        assert client.command_queue.get() == "start"
+
+
+def test_send_after_disconnect_raises_connection_error(server):
+    client = connect(server)
+    for writer in list(server.writers):
+        server.loop.call_soon_threadsafe(writer.close)
+    wait_for(lambda: client.sock is None)
+
+    with pytest.raises(ConnectionResetError):
+        client.data_queue.put(b"frame")
+
+
+def test_rejects_wrong_authkey(server):
+    client = TransportClient("127.0.0.1", server.port, authkey=b"wrong")
+    client.connect()
+    wait_for(lambda: client.sock is None)
+    assert not server.writers
+
+
+def test_sender_blocks_until_server_consumes_frames(server):
+    client = connect(server)
+    sender = threading.Thread(
+        target=lambda: [
+            client.data_queue.put(b"frame") for _ in range(SEND_WINDOW + 1)
+        ],
+        daemon=True,
+    )
+    sender.start()
+
+    wait_for(lambda: client.sent == SEND_WINDOW)
+    time.sleep(0.2)
+    assert sender.is_alive()
+    assert client.sent == SEND_WINDOW
+
+    for _ in range(ACK_BATCH):
+        server.data_queue.get(timeout=2)
+    sender.join(timeout=2)
+    assert not sender.is_alive()
+    assert client.sent == SEND_WINDOW + 1
+
+
+def test_stop_closes_connections_and_thread(server):
+    client = connect(server)
+
+    server.stop()
+
+    assert not server.thread.is_alive()
+    wait_for(lambda: client.sock is None)
+    server.broadcast("start")
+
+
+def test_silent_client_is_dropped_after_auth_timeout(server, monkeypatch):
+    monkeypatch.setattr(transport, "AUTH_TIMEOUT", 0.2)
+    sock = socket.create_connection(("127.0.0.1", server.port))
+    sock.settimeout(2)
+    try:
+        msg_type, _ = transport.recv_message(sock)
+        assert msg_type == transport.MSG_CHALLENGE
+        assert sock.recv(1) == b""
+    finally:
+        sock.close()
+    assert not server.writers
+
+
+def test_oversized_hello_is_rejected_before_reading_it(server):
+    sock = socket.create_connection(("127.0.0.1", server.port))
+    sock.settimeout(2)
+    try:
+        transport.recv_message(sock)
+        sock.sendall(
+            transport.HEADER.pack(transport.MAX_MESSAGE_SIZE, transport.MSG_HELLO)
+        )
+        assert sock.recv(1) == b""
+    finally:
+        sock.close()
+    assert not server.writers
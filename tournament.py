@@ -0,0 +1,279 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from config import ICP_COARSE_STEP, ICP_MAX_ITERATIONS, ROBUST_ICP
+from matching import ICP, ShapeComparator
+from robots import FIELD_LIMIT, Glasha, Masha, Natasha, Sasha
+
+ROUNDS_PER_CHUNK = 1000
+CHECKPOINT_FILE = "tournament.json"
+CHECKPOINT_INTERVAL = 10
+MSE_BINS = np.logspace(-2, 2, 81)
+
+_robots = None
+_indexes = None
+
+
+def make_robots():
+    return [Glasha(), Sasha(), Masha(), Natasha()]
+
+
+def init_worker():
+    """
+    Создаёт роботов и индексы эталонов один раз на процесс пула.
+    :return:
+    """
+    global _robots, _indexes
+    _robots = make_robots()
+    _indexes = [ShapeComparator.build_index(robot.shape.points) for robot in _robots]
+
+
+def play_chunk(chunk_id, rounds, seed, max_iterations, robust=False):
+    """
+    Проводит серию раундов без IPC и GUI.
+    :param chunk_id: Номер серии (вместе с seed определяет поток генератора).
+    :param rounds: Число раундов в серии.
+    :param seed: Базовое зерно турнира.
+    :param max_iterations: Максимальное число итераций ICP.
+    :param robust: Использовать устойчивый ICP без точек на границе поля.
+    :return: Номер серии и её статистика.
+    """
+    # Пара (seed, chunk_id) даёт независимые потоки: турниры с разными
+    # seed не повторяют серии друг друга со сдвигом.
+    rng = np.random.default_rng(np.random.SeedSequence([seed, chunk_id]))
+    mse = np.empty((rounds, len(_robots)))
+
+    for round_index in range(rounds):
+        for robot_index, (robot, index) in enumerate(zip(_robots, _indexes)):
+            robot.generate_distorted_shape(rng)
+            if robust:
+                mse[round_index, robot_index] = ICP.robust_icp_align(
+                    robot.shape.points,
+                    robot.points,
+                    max_iterations=max_iterations,
+                    clip_limit=FIELD_LIMIT,
+                    index=index,
+                )["mse"]
+            else:
+                _, mse[round_index, robot_index] = ICP.icp_align(
+                    robot.shape.points,
+                    robot.points,
+                    max_iterations=max_iterations,
+                    coarse_step=ICP_COARSE_STEP,
+                    index=index,
+                )
+
+    winners = np.argmin(mse, axis=1)
+    clipped = np.clip(mse, MSE_BINS[0], MSE_BINS[-1])
+    return chunk_id, {
+        "rounds": rounds,
+        "wins": np.bincount(winners, minlength=len(_robots)).tolist(),
+        "mse_sum": mse.sum(axis=0).tolist(),
+        "mse_sq_sum": (mse**2).sum(axis=0).tolist(),
+        "mse_min": mse.min(axis=0).tolist(),
+        "mse_max": mse.max(axis=0).tolist(),
+        "histogram": [
+            np.histogram(clipped[:, i], bins=MSE_BINS)[0].tolist()
+            for i in range(len(_robots))
+        ],
+    }
+
+
+class TournamentStats:
+    """
+    Накопленная статистика турнира: победы и распределения MSE по роботам.
+    Обновляется по мере завершения серий и сохраняется на диск.
+    """
+
+    def __init__(
+        self,
+        names,
+        seed,
+        max_iterations,
+        robust=False,
+        total_rounds=0,
+        rounds_per_chunk=ROUNDS_PER_CHUNK,
+    ):
+        self.names = names
+        self.seed = seed
+        self.max_iterations = max_iterations
+        self.robust = robust
+        self.total_rounds = total_rounds
+        self.rounds_per_chunk = rounds_per_chunk
+        self.rounds = 0
+        self.completed = set()
+        self.wins = [0] * len(names)
+        self.mse_sum = [0.0] * len(names)
+        self.mse_sq_sum = [0.0] * len(names)
+        self.mse_min = [float("inf")] * len(names)
+        self.mse_max = [0.0] * len(names)
+        self.histogram = [[0] * (len(MSE_BINS) - 1) for _ in names]
+
+    def update(self, chunk_id, chunk):
+        """
+        Добавляет результаты серии.
+        :param chunk_id: Номер серии.
+        :param chunk: Статистика серии из play_chunk.
+        :return:
+        """
+        self.completed.add(chunk_id)
+        self.rounds += chunk["rounds"]
+        for i in range(len(self.names)):
+            self.wins[i] += chunk["wins"][i]
+            self.mse_sum[i] += chunk["mse_sum"][i]
+            self.mse_sq_sum[i] += chunk["mse_sq_sum"][i]
+            self.mse_min[i] = min(self.mse_min[i], chunk["mse_min"][i])
+            self.mse_max[i] = max(self.mse_max[i], chunk["mse_max"][i])
+            self.histogram[i] = [
+                a + b for a, b in zip(self.histogram[i], chunk["histogram"][i])
+            ]
+
+    def save(self, filename):
+        """
+        Атомарно записывает контрольную точку.
+        :param filename: Путь к файлу.
+        :return:
+        """
+        data = dict(vars(self), completed=sorted(self.completed))
+        data["bins"] = MSE_BINS.tolist()
+        tmp_filename = f"{filename}.tmp"
+        with open(tmp_filename, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_filename, filename)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Загружает контрольную точку.
+        :param filename: Путь к файлу.
+        :return: TournamentStats.
+        """
+        with open(filename, encoding="utf-8") as f:
+            data = json.load(f)
+        data.pop("bins", None)
+        stats = cls(
+            data.pop("names"),
+            data.pop("seed"),
+            data.pop("max_iterations"),
+            data.pop("robust", False),
+            data.pop("total_rounds", None),
+            data.pop("rounds_per_chunk", None),
+        )
+        for key, value in data.items():
+            setattr(stats, key, value)
+        stats.completed = set(stats.completed)
+        return stats
+
+    def print_summary(self):
+        print(f"Раундов: {self.rounds}")
+        for i, name in enumerate(self.names):
+            count = max(self.rounds, 1)
+            mean = self.mse_sum[i] / count
+            std = np.sqrt(max(self.mse_sq_sum[i] / count - mean**2, 0.0))
+            print(
+                f"{name}: побед {self.wins[i]} ({self.wins[i] / count:.2%}), "
+                f"MSE {mean:.4f} ± {std:.4f} "
+                f"[{self.mse_min[i]:.4f}; {self.mse_max[i]:.4f}]"
+            )
+
+
+def run_tournament(
+    rounds,
+    workers=None,
+    seed=0,
+    max_iterations=ICP_MAX_ITERATIONS,
+    robust=ROBUST_ICP,
+    checkpoint=CHECKPOINT_FILE,
+):
+    """
+    Проводит турнир на пуле процессов, продолжая с контрольной точки, если она есть.
+    :param rounds: Общее число раундов.
+    :param workers: Число процессов (по умолчанию — число ядер).
+    :param seed: Базовое зерно генератора.
+    :param max_iterations: Максимальное число итераций ICP.
+    :param robust: Использовать устойчивый ICP без точек на границе поля.
+    :param checkpoint: Файл контрольной точки.
+    :return: TournamentStats.
+    """
+    if os.path.exists(checkpoint):
+        stats = TournamentStats.load(checkpoint)
+        # Разбиение на серии зависит от общего числа раундов, поэтому
+        # продолжать можно только тот же турнир.
+        if (
+            stats.seed,
+            stats.max_iterations,
+            stats.robust,
+            stats.total_rounds,
+            stats.rounds_per_chunk,
+        ) != (seed, max_iterations, robust, rounds, ROUNDS_PER_CHUNK):
+            raise ValueError(
+                f"Контрольная точка {checkpoint} создана с другими параметрами"
+            )
+        print(f"Продолжаем с контрольной точки: {stats.rounds} раундов")
+    else:
+        stats = TournamentStats(
+            [robot.name for robot in make_robots()],
+            seed,
+            max_iterations,
+            robust,
+            rounds,
+            ROUNDS_PER_CHUNK,
+        )
+
+    chunks = [
+        (chunk_id, min(ROUNDS_PER_CHUNK, rounds - start))
+        for chunk_id, start in enumerate(range(0, rounds, ROUNDS_PER_CHUNK))
+        if chunk_id not in stats.completed
+    ]
+
+    st_time = time.time()
+    last_checkpoint = st_time
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        futures = [
+            pool.submit(play_chunk, chunk_id, size, seed, max_iterations, robust)
+            for chunk_id, size in chunks
+        ]
+        try:
+            for future in as_completed(futures):
+                stats.update(*future.result())
+                if time.time() - last_checkpoint > CHECKPOINT_INTERVAL:
+                    stats.save(checkpoint)
+                    last_checkpoint = time.time()
+                    print(
+                        f"Сыграно {stats.rounds}/{rounds} раундов "
+                        f"за {last_checkpoint - st_time:.1f}s"
+                    )
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            print("Турнир прерван, сохраняем контрольную точку...")
+        finally:
+            stats.save(checkpoint)
+
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Турнир без GUI")
+    parser.add_argument("rounds", type=int)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-iterations", type=int, default=ICP_MAX_ITERATIONS)
+    parser.add_argument("--robust", action="store_true", default=ROBUST_ICP)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE)
+    args = parser.parse_args()
+
+    result = run_tournament(
+        args.rounds,
+        workers=args.workers,
+        seed=args.seed,
+        max_iterations=args.max_iterations,
+        robust=args.robust,
+        checkpoint=args.checkpoint,
+    )
+    result.print_summary()
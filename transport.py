@@ -0,0 +1,467 @@
+import asyncio
+import hmac
+import os
+import queue
+import socket
+import struct
+import threading
+
+from config import AUTHKEY, TRANSPORT_BIND_HOST, TRANSPORT_HOST, TRANSPORT_PORT
+
+HEADER = struct.Struct("!IB")
+ACK = struct.Struct("!Q")
+ROUTE = struct.Struct("!IH")
+
+MSG_HELLO = 1
+MSG_DATA = 2
+MSG_COMMAND = 3
+MSG_ACK = 4
+MSG_CHALLENGE = 5
+
+CHALLENGE_SIZE = 32
+# Ответ на вызов: подпись и приветствие. Больше до проверки ключа не читаем.
+MAX_HELLO_SIZE = CHALLENGE_SIZE + 4096
+AUTH_TIMEOUT = 5
+
+ACK_BATCH = 32
+SEND_WINDOW = 8 * ACK_BATCH
+MAX_MESSAGE_SIZE = 16 * 1048576
+
+
+def pack_message(msg_type, payload=b""):
+    """
+    Упаковывает сообщение: длина (4 байта) + тип (1 байт) + полезная нагрузка.
+    :param msg_type: Тип сообщения (MSG_*).
+    :param payload: Полезная нагрузка в байтах.
+    :return: Готовый к отправке кадр.
+    """
+    return HEADER.pack(len(payload), msg_type) + payload
+
+
+async def read_message(reader, max_size=MAX_MESSAGE_SIZE):
+    """
+    Читает одно сообщение из asyncio-потока.
+    :param reader: asyncio.StreamReader.
+    :param max_size: Наибольший допустимый размер полезной нагрузки.
+    :return: Тип сообщения и полезная нагрузка.
+    """
+    header = await reader.readexactly(HEADER.size)
+    size, msg_type = HEADER.unpack(header)
+    if size > max_size:
+        raise ValueError(f"Слишком большое сообщение: {size} байт")
+    payload = await reader.readexactly(size) if size else b""
+    return msg_type, payload
+
+
+def recv_message(sock):
+    """
+    Читает одно сообщение из блокирующего сокета.
+    :param sock: Подключённый сокет.
+    :return: Тип сообщения и полезная нагрузка.
+    """
+    size, msg_type = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+    if size > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Слишком большое сообщение: {size} байт")
+    return msg_type, _recv_exactly(sock, size)
+
+
+def pack_route(round_number, robot_id):
+    """
+    Упаковывает заголовок маршрутизации кадра: номер раунда (4 байта),
+    длина идентификатора робота (2 байта) и сам идентификатор.
+    :param round_number: Номер раунда.
+    :param robot_id: Идентификатор робота.
+    :return: Заголовок, который ставится перед JSON кадра.
+    """
+    key = robot_id.encode("utf-8")
+    return ROUTE.pack(round_number, len(key)) + key
+
+
+def unpack_route(payload):
+    """
+    Читает заголовок маршрутизации, не разбирая JSON кадра.
+    :param payload: Кадр с заголовком из pack_route.
+    :return: Номер раунда, идентификатор робота и смещение JSON в кадре.
+    """
+    round_number, size = ROUTE.unpack_from(payload)
+    start = ROUTE.size
+    offset = start + size
+    return round_number, payload[start:offset].decode("utf-8"), offset
+
+
+def sign_challenge(authkey, challenge):
+    """
+    Подписывает вызов сервера общим ключом.
+    :param authkey: Ключ авторизации.
+    :param challenge: Случайные байты от сервера.
+    :return: HMAC-SHA256 (32 байта).
+    """
+    return hmac.new(authkey, challenge, "sha256").digest()
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionResetError("Соединение закрыто")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+class CommandBroadcast:
+    """
+    Очередь команд на стороне сервера: каждая команда рассылается всем
+    подключённым клиентам. Повторяет интерфейс put() обычной очереди.
+    """
+
+    def __init__(self, server):
+        self.server = server
+
+    def put(self, command):
+        self.server.broadcast(command)
+
+
+class ServerDataQueue:
+    """
+    Принятые кадры на стороне сервера. Интерфейс empty()/get() совпадает с
+    прокси очереди BaseManager; get() засчитывает кадр отправителю, и только
+    обработанные кадры подтверждаются клиенту.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.queue = queue.Queue()
+
+    def empty(self):
+        return self.queue.empty()
+
+    def get(self, block=True, timeout=None):
+        payload, writer = self.queue.get(block, timeout)
+        loop = self.server.loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self.server.acknowledge, writer)
+        return payload, writer
+
+    def put(self, item):
+        self.queue.put(item)
+
+
+class TransportServer:
+    """
+    asyncio-сервер, принимающий кадры роботов по постоянным TCP-соединениям.
+    Все соединения обслуживаются одним потоком с циклом событий. Кадр
+    подтверждается после обработки, подтверждения отправляются пачками,
+    поэтому клиент не может уйти дальше SEND_WINDOW необработанных кадров.
+    """
+
+    def __init__(self, host=TRANSPORT_BIND_HOST, port=TRANSPORT_PORT, authkey=AUTHKEY):
+        self.host = host
+        self.port = port
+        self.authkey = authkey
+        self.data_queue = ServerDataQueue(self)
+        self.command_queue = CommandBroadcast(self)
+        self.loop = None
+        self.writers = set()
+        # Соединение -> [обработано кадров, подтверждено кадров].
+        self.acks = {}
+        self.ready = threading.Event()
+        self.error = None
+        self.thread = None
+
+    def start(self):
+        """
+        Запускает цикл событий сервера в фоновом потоке.
+        Бросает OSError, если не удалось занять адрес.
+        :return: Поток сервера.
+        """
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        if self.error is not None:
+            raise self.error
+        return self.thread
+
+    def stop(self, timeout=5):
+        """
+        Останавливает цикл событий сервера, закрывает соединения и ждёт
+        завершения потока.
+        :param timeout: Сколько ждать поток сервера, с.
+        :return:
+        """
+        loop = self.loop
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        self.thread.join(timeout)
+
+    def serve_forever(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            server = loop.run_until_complete(
+                asyncio.start_server(self.handle_connection, self.host, self.port)
+            )
+            self.loop = loop
+            # При port=0 система выбирает свободный порт.
+            self.port = server.sockets[0].getsockname()[1]
+        except OSError as e:
+            self.error = e
+            loop.close()
+            return
+        finally:
+            self.ready.set()
+
+        print(f"Транспорт запущен на {self.host}:{self.port}")
+        try:
+            loop.run_forever()
+        finally:
+            self.loop = None
+            server.close()
+            for writer in list(self.writers):
+                writer.close()
+            # Закрытые соединения дочитываются до конца, и обработчики
+            # завершаются сами до закрытия цикла.
+            tasks = asyncio.all_tasks(loop)
+            if tasks:
+                loop.run_until_complete(asyncio.wait(tasks, timeout=1))
+            loop.run_until_complete(server.wait_closed())
+            loop.close()
+
+    def broadcast(self, command):
+        """
+        Потокобезопасно рассылает команду всем клиентам.
+        :param command: Строка команды.
+        :return:
+        """
+        if self.loop is None:
+            return
+        message = pack_message(MSG_COMMAND, command.encode("utf-8"))
+        self.loop.call_soon_threadsafe(self._write_all, message)
+
+    def send_command(self, command, writer):
+        """
+        Потокобезопасно отправляет команду одному клиенту.
+        :param command: Строка команды.
+        :param writer: Поток записи соединения из data_queue.
+        :return:
+        """
+        if self.loop is None:
+            return
+        message = pack_message(MSG_COMMAND, command.encode("utf-8"))
+        self.loop.call_soon_threadsafe(self._write_one, message, writer)
+
+    def _write_all(self, message):
+        for writer in self.writers:
+            writer.write(message)
+
+    def _write_one(self, message, writer):
+        if writer in self.writers:
+            writer.write(message)
+
+    def acknowledge(self, writer):
+        """
+        Засчитывает обработанный кадр соединения и раз в ACK_BATCH кадров
+        отправляет подтверждение. Вызывается в потоке цикла событий.
+        :param writer: Поток записи соединения, от которого пришёл кадр.
+        :return:
+        """
+        counters = self.acks.get(writer)
+        if counters is None:
+            return
+        counters[0] += 1
+        if counters[0] - counters[1] >= ACK_BATCH:
+            writer.write(pack_message(MSG_ACK, ACK.pack(counters[0])))
+            counters[1] = counters[0]
+
+    def on_data(self, payload, writer):
+        """
+        Обрабатывает принятый кадр данных. Переопределяется в наследниках;
+        наследник, обрабатывающий кадр сразу, сам вызывает acknowledge().
+        В очередь кладётся пара (кадр, соединение), чтобы ответить "next"
+        только отправителю; подтверждение уйдёт, когда кадр заберут из очереди.
+        :param payload: Сериализованный кадр робота.
+        :param writer: Поток записи соединения, от которого пришёл кадр.
+        :return:
+        """
+        self.data_queue.put((payload, writer))
+
+    def on_hello(self, hello, writer):
+        """
+        Обрабатывает приветствие клиента. Переопределяется в наследниках.
+        :param hello: Строка с описанием клиента.
+        :param writer: Поток записи соединения.
+        :return:
+        """
+        print(f"Подключён клиент: {hello}")
+
+    def on_disconnect(self, writer):
+        """
+        Обрабатывает отключение клиента. Переопределяется в наследниках.
+        :param writer: Поток записи соединения.
+        :return:
+        """
+
+    async def authenticate(self, reader, writer):
+        """
+        Проверяет, что клиент знает ключ: он должен подписать случайный вызов.
+        Ответ ждём не дольше AUTH_TIMEOUT и не больше MAX_HELLO_SIZE байт.
+        :return: Приветствие клиента или None, если проверка не пройдена.
+        """
+        challenge = os.urandom(CHALLENGE_SIZE)
+        writer.write(pack_message(MSG_CHALLENGE, challenge))
+        try:
+            msg_type, payload = await asyncio.wait_for(
+                read_message(reader, MAX_HELLO_SIZE), AUTH_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            print(f"Нет ответа на вызов: {writer.get_extra_info('peername')}")
+            return None
+        digest, hello = payload[:CHALLENGE_SIZE], payload[CHALLENGE_SIZE:]
+        if msg_type != MSG_HELLO or not hmac.compare_digest(
+            digest, sign_challenge(self.authkey, challenge)
+        ):
+            print(f"Отклонено подключение: {writer.get_extra_info('peername')}")
+            return None
+        return hello.decode("utf-8")
+
+    async def handle_connection(self, reader, writer):
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            hello = await self.authenticate(reader, writer)
+            if hello is None:
+                return
+            self.on_hello(hello, writer)
+            self.writers.add(writer)
+            self.acks[writer] = [0, 0]
+
+            while True:
+                msg_type, payload = await read_message(reader)
+                if msg_type == MSG_DATA:
+                    self.on_data(payload, writer)
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.acks.pop(writer, None)
+            if writer in self.writers:
+                self.writers.discard(writer)
+                self.on_disconnect(writer)
+            writer.close()
+
+
+class ClientCommandQueue:
+    """
+    Команды, полученные клиентом от сервера. Интерфейс empty()/get()
+    совпадает с прокси очереди BaseManager.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def empty(self):
+        return self.queue.empty()
+
+    def get(self):
+        return self.queue.get()
+
+    def put(self, command):
+        self.queue.put(command)
+
+
+class ClientDataQueue:
+    """
+    Отправка кадров на сервер. put() блокируется, если сервер ещё не
+    обработал SEND_WINDOW отправленных кадров.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def put(self, payload):
+        self.client.send_data(payload)
+
+
+class TransportClient:
+    """
+    Клиент транспорта: одно постоянное соединение на процесс, через которое
+    идут кадры всех его роботов. Кадры, которые присылает сервер (например,
+    воркерам флота), складываются в inbox.
+    """
+
+    def __init__(
+        self, host=TRANSPORT_HOST, port=TRANSPORT_PORT, name="robots", authkey=AUTHKEY
+    ):
+        self.host = host
+        self.port = port
+        self.name = name
+        self.authkey = authkey
+        self.sock = None
+        self.sent = 0
+        self.acked = 0
+        self.window = threading.Condition()
+        self.send_lock = threading.Lock()
+        self.data_queue = ClientDataQueue(self)
+        self.command_queue = ClientCommandQueue()
+        self.inbox = queue.Queue()
+
+    def connect(self):
+        """
+        Подключается к серверу и запускает поток чтения команд.
+        Бросает ConnectionRefusedError, если сервер ещё не запущен.
+        :return:
+        """
+        sock = socket.create_connection((self.host, self.port))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        msg_type, challenge = recv_message(sock)
+        if msg_type != MSG_CHALLENGE:
+            sock.close()
+            raise ConnectionRefusedError("Сервер не прислал вызов авторизации")
+        sock.sendall(
+            pack_message(
+                MSG_HELLO,
+                sign_challenge(self.authkey, challenge) + self.name.encode("utf-8"),
+            )
+        )
+        self.sock = sock
+        threading.Thread(target=self.read_loop, daemon=True).start()
+
+    def read_loop(self):
+        try:
+            while True:
+                msg_type, payload = recv_message(self.sock)
+                if msg_type == MSG_COMMAND:
+                    self.command_queue.put(payload.decode("utf-8"))
+                elif msg_type == MSG_DATA:
+                    self.inbox.put(payload)
+                elif msg_type == MSG_ACK:
+                    with self.window:
+                        (self.acked,) = ACK.unpack(payload)
+                        self.window.notify_all()
+        except (ConnectionError, OSError, ValueError):
+            with self.window:
+                self.sock = None
+                self.window.notify_all()
+
+    def send_data(self, payload):
+        """
+        Отправляет кадр на сервер с учётом окна подтверждений.
+        :param payload: Сериализованный кадр.
+        :return:
+        """
+        with self.window:
+            while self.sock is not None and self.sent - self.acked >= SEND_WINDOW:
+                self.window.wait()
+            sock = self.sock
+            if sock is None:
+                raise ConnectionResetError("Соединение с сервером потеряно")
+            self.sent += 1
+        with self.send_lock:
+            sock.sendall(pack_message(MSG_DATA, payload))
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()